@@ -1,21 +1,26 @@
 from two_terminal_component import *
-from functools import reduce
 import math, cmath
+import numpy as np
 
 from two_terminal_component import Value
 
 class Branch():
     """
-    Wrapper class for a circuit branch consisting of source, sink identifiers and a list of components
+    Wrapper class for a circuit branch consisting of source, sink identifiers and a list of components.
+    Components connected in series are combined into a single component tree.
     """
     source: int
     sink: int
-    components: list[TwoTerminalComponent] | TwoTerminalComponent
+    components: list[TwoTerminalComponent]
+    tree: TwoTerminalComponent | None
+    characteristic: CurrentVoltageCharacteristic | None
 
     def __init__(self, source, sink, components) -> None:
         self.source = source
         self.sink = sink
         self.components = components
+        self.tree = None
+        self.characteristic = None
 
 class Optimizer():
     """
@@ -38,7 +43,10 @@ class Newton(Optimizer):
     Calculates learning rate based on current loss and gradient norm (bad)
     """
     def step(self, loss: float) -> None:
-        grad_norm_sq = reduce(lambda acc, param: acc + abs(param.grad)**2, self.params, 0.0)
+        grad_norm_sq = 0.0
+        for param in self.params:
+            grad = param.grad
+            grad_norm_sq += grad.real*grad.real + grad.imag*grad.imag
         lr = 0.01*loss/grad_norm_sq
         for param in self.params:
             param.data -= lr * param.grad.conjugate()
@@ -75,14 +83,33 @@ class Adam(Optimizer):
             param.data -= self.lr * self.m[i]/(math.sqrt(self.v[i])+1e-30)
         self.prev_loss = loss
 
+class NewtonExact(Optimizer):
+    """
+    Makes Newton steps using the constant Hessian of the loss, which is quadratic in the parameters. Converges in one step.
+    Hessian is given in the same convention as gradients, so that the step equals -H^-1 conj(grad).
+    """
+    inverse_hessian: np.ndarray
+
+    def __init__(self, params: list[Value], hessian: np.ndarray) -> None:
+        super().__init__(params)
+        # hessian does not change with parameter values, so it is inverted only once
+        self.inverse_hessian = np.linalg.pinv(hessian, hermitian=True)
+
+    def step(self, loss: float = None) -> None:
+        grad = np.array([param.grad for param in self.params], dtype=np.complex128)
+        delta = -self.inverse_hessian @ grad.conj()
+        for param, d in zip(self.params, delta.tolist()):
+            param.data += d
+
 class CircuitSolver():
     """
     Encapsulates logic for solving linear electric circuits 
     """
     reference_node: int | None
-    node_potentials: dict[int, Value | complex]
-    node_currents: dict[int, Value]
+    node_index: dict[int, int]
+    current_index: dict[int, int]
     branch_currents: dict[int, Value]
+    learnable_params: list[Value]
     optimizer: Optimizer
     components: dict[str, TwoTerminalComponent]
 
@@ -90,54 +117,77 @@ class CircuitSolver():
         self.branches = branches
         self._init_components_dict()
         self._init_nodes()
-        self._init_optimizer()
+        self._init_params()
 
     def _init_nodes(self):
         """
         Initialize voltages at nodes, currents through branches with constant voltage differences. These are 'learnable parameters'.
         """
-        # TODO: write tests for this function
-
         self.reference_node = None
-        self.node_currents = dict()
-        self.node_potentials = dict()
+        node_potentials = dict()
         self.branch_currents = dict()
         
         for i, branch in enumerate(self.branches):
             assert len(branch.components) > 0, "branche has to have at least one component!"
             if len(branch.components) == 1:
-                branch.components = branch.components[0]
+                branch.tree = branch.components[0]
             else:
-                branch.components = reduce(lambda a, b: a & b, branch.components, Series())
+                branch.tree = Series.from_iterable(branch.components)
                 
             # first we only insert ideal voltage source components
-            if branch.components.component_type == ComponentType.IDEAL_VOLTAGE_SOURCE:
-                voltage_delta = branch.components.current_voltage_characteristic(omega=0).free_coefficient
+            if isinstance(branch.tree, IdealVoltageSource):
+                voltage_delta = branch.tree.current_voltage_characteristic(omega=0).free_coefficient
                 if self.reference_node is None:
                     self.reference_node = branch.source
-                    self.node_potentials[branch.source] = Value(0)
-                    self.node_potentials[branch.sink] = self.node_potentials[branch.source] - voltage_delta
-                elif branch.source not in self.node_potentials:
-                    if branch.sink not in self.node_potentials:
-                        self.node_potentials[branch.source] = Value(0)
-                        self.node_potentials[branch.sink] = self.node_potentials[branch.source] - voltage_delta
+                    node_potentials[branch.source] = Value(0)
+                    node_potentials[branch.sink] = node_potentials[branch.source] - voltage_delta
+                elif branch.source not in node_potentials:
+                    if branch.sink not in node_potentials:
+                        node_potentials[branch.source] = Value(0)
+                        node_potentials[branch.sink] = node_potentials[branch.source] - voltage_delta
                     else:
-                        self.node_potentials[branch.source] = self.node_potentials[branch.sink] + voltage_delta
+                        node_potentials[branch.source] = node_potentials[branch.sink] + voltage_delta
                 else:
-                    if branch.sink not in self.node_potentials:
-                        self.node_potentials[branch.sink] = self.node_potentials[branch.source] - voltage_delta
-                    elif not cmath.isclose(self.node_potentials[branch.source].data - self.node_potentials[branch.sink].data, voltage_delta):
+                    if branch.sink not in node_potentials:
+                        node_potentials[branch.sink] = node_potentials[branch.source] - voltage_delta
+                    elif not cmath.isclose(node_potentials[branch.source].data - node_potentials[branch.sink].data, voltage_delta):
                         raise RuntimeError(f'Configuration invalid: nodes {branch.source}, {branch.sink}!')
                 self.branch_currents[i] = Value(0)
         
         for branch in self.branches:
             if self.reference_node is None:
                 self.reference_node = branch.source
-                self.node_potentials[branch.source] = Value(0+0j)
-            if branch.source not in self.node_potentials:
-                self.node_potentials[branch.source] = Value(0+0j)
-            if branch.sink not in self.node_potentials:
-                self.node_potentials[branch.sink] = Value(0+0j)
+                node_potentials[branch.source] = Value(0+0j)
+            if branch.source not in node_potentials:
+                node_potentials[branch.source] = Value(0+0j)
+            if branch.sink not in node_potentials:
+                node_potentials[branch.sink] = Value(0+0j)
+
+        # unknowns of the linear system: node potentials (reference node comes first) followed by currents through ideal voltage sources
+        self.node_index = {self.reference_node: 0}
+        for node_id in node_potentials:
+            if node_id != self.reference_node:
+                self.node_index[node_id] = len(self.node_index)
+        self.current_index = dict()
+        for branch_id in self.branch_currents:
+            self.current_index[branch_id] = len(self.node_index) + len(self.current_index)
+
+        # topology of the circuit as arrays of node indices, separately for branches with and without ideal voltage sources
+        self._passive_branches = [j for j in range(len(self.branches)) if j not in self.current_index]
+        self._src = np.array([self.node_index[self.branches[j].source] for j in self._passive_branches], dtype=np.int32)
+        self._sink = np.array([self.node_index[self.branches[j].sink] for j in self._passive_branches], dtype=np.int32)
+        self._vsrc_src = np.array([self.node_index[self.branches[j].source] for j in self.current_index], dtype=np.int32)
+        self._vsrc_sink = np.array([self.node_index[self.branches[j].sink] for j in self.current_index], dtype=np.int32)
+        # node potentials are stored by index, node_potentials dict is assembled only on demand
+        self._node_values = [node_potentials[node_id] for node_id in self.node_index]
+        self._vsrc_currents = [self.branch_currents[branch_id] for branch_id in self.current_index]
+
+    @property
+    def node_potentials(self) -> dict[int, Value]:
+        """
+        Returns potentials of the nodes keyed by node identifiers.
+        """
+        return {node_id: self._node_values[i] for node_id, i in self.node_index.items()}
 
     def _init_components_dict(self) -> None:
         """
@@ -148,58 +198,263 @@ class CircuitSolver():
             for component in branch.components:
                 self.components[component.label] = component
 
-    def _init_optimizer(self) -> None:
+    def _init_params(self) -> None:
         """
-        Initialize optimization algo with learnable parameters.
+        Collect learnable parameters ie. independent node potentials and currents through ideal voltage sources.
         """
         learnable_params = []
-        for node_id, node in self.node_potentials.items():
+        for node in self._node_values[1:]:
             # skip reference node and nodes whose voltage is not independent of other nodes
-            if node_id != self.reference_node and node.is_leaf:
+            if node.is_leaf:
                 learnable_params.append(node)
+        # node potentials are affine in learnable ones, V = M x + v0, since dependent nodes differ from their root by a constant
+        param_index = {param: p for p, param in enumerate(learnable_params)}
+        self._potential_map = np.zeros((len(self._node_values), len(learnable_params)), dtype=np.complex128)
+        self._potential_offsets = np.zeros(len(self._node_values), dtype=np.complex128)
+        for i, node in enumerate(self._node_values):
+            while not node.is_leaf:
+                self._potential_offsets[i] += node.inputs[1]
+                node = node.inputs[0]
+            if node in param_index:
+                self._potential_map[i, param_index[node]] = 1
+
         for current in self.branch_currents.values():
             learnable_params.append(current)
-        self.optimizer = Adam(learnable_params)
+        self.learnable_params = learnable_params
+        # potentials of dependent nodes are updated after each step, in order of creation so that their inputs are up to date
+        self._dependent_nodes = [node for node in self._node_values if not node.is_leaf]
+
+    def _init_optimizer(self, omega: float) -> None:
+        """
+        Initialize optimization algo with learnable parameters.
+        Node currents are linear in learnable parameters, I = J x + r0. Since Jacobian J is constant for given omega,
+        it is calculated only once, together with r0, from the modified nodal analysis equations.
+        Hence, Hessian of the loss is constant too and Newton's method is used.
+
+        Parameters:
+        -----------
+        omega: float
+            Angular frequency of all the energy sources in the circuit
+        """
+        A, b = self._mna_system()
+        n = len(self.node_index)
+        G, E = A[:n, :n], A[:n, n:]
+        self._jacobian = np.hstack((G @ self._potential_map, E))
+        self._residual_offset = G @ self._potential_offsets - b[:n]
+        # buffers reused by every epoch
+        self._params_data = np.zeros(len(self.learnable_params), dtype=np.complex128)
+        self._residual = np.zeros(n, dtype=np.complex128)
+        self._loss_params = tuple(self.learnable_params)
+        self.optimizer = NewtonExact(self.learnable_params, 2 * (self._jacobian.conj().T @ self._jacobian) / n)
 
     def _update_dependent_nodes(self):
-        for node in self.node_potentials.values():
-            if not node.is_leaf:
-                node.data = node.inputs[0].data + node.inputs[1]
+        for node in self._dependent_nodes:
+            node.data = node.inputs[0].data + node.inputs[1]
+
+    def solve(self, omega: float = 0., iterative: bool = False, max_epochs: int = 200) -> tuple[list[float], dict[int, complex]]:
+        """
+        Finds the correct node voltages and branch currents. By default, modified nodal analysis equations are solved directly.
+
+        Parameters:
+        -----------
+        omega: float
+            Angular frequency of all the energy sources in the circuit
+        iterative: bool
+            Should the solution be found via loss minimization instead?
+        max_epochs: int
+            Maximum number of epochs of loss minimization
+        """
+        self._init_admittances(omega)
+        history = self._minimize_loss(omega, max_epochs) if iterative else self._solve_directly(omega)
+        
+        self._apply_node_voltages(omega)
+
+        return history, {node_id: CircuitSolver._round_complex(self._node_values[i].data) for node_id, i in self.node_index.items()}
+
+    def solve_sweep(self, omegas: list[float] | np.ndarray) -> np.ndarray:
+        """
+        Finds node voltages for each of the given angular frequencies. All the systems of modified nodal analysis equations
+        are solved in a single batched call. Electrical state of the components is not affected by this operation.
+
+        Parameters:
+        -----------
+        omegas: list[float] | np.ndarray
+            Angular frequencies of all the energy sources in the circuit
+
+        Returns:
+        Node voltages as an array of shape (len(omegas), number of nodes), with nodes ordered as in node_index
+        """
+        omegas = np.asarray(omegas, dtype=np.float64)
+        n = len(self.node_index)
+        # characteristics of all the branches are evaluated for all the omegas at once
+        Y = np.zeros((len(omegas), len(self._passive_branches)), dtype=np.complex128)
+        Is = np.zeros((len(omegas), len(self._passive_branches)), dtype=np.complex128)
+        for i, j in enumerate(self._passive_branches):
+            a, impedance, free = self.branches[j].tree.calculate_current_voltage_characteristics(omegas)
+            if np.any(a & (impedance == 0)):
+                raise RuntimeError(f'Configuration invalid: branch {j} has fixed voltage but no ideal voltage source!')
+            Y[:, i] = np.divide(1, -impedance, out=np.zeros_like(impedance), where=a)
+            Is[:, i] = np.where(a, -free * Y[:, i], free)
+        E = np.empty((len(omegas), len(self.current_index)), dtype=np.complex128)
+        for k, j in enumerate(self.current_index):
+            E[:, k] = self.branches[j].tree.calculate_current_voltage_characteristics(omegas)[2]
+        A, b = self._mna_systems(Y, Is, E)
+        try:
+            x = np.linalg.solve(A[:, 1:, 1:], b[:, 1:, np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            raise RuntimeError('Configuration invalid: circuit does not have a unique solution!')
+
+        V = np.zeros((len(omegas), n), dtype=np.complex128)
+        V[:, 1:] = x[:, :n-1]
+        return V
+
+    def _init_admittances(self, omega: float) -> None:
+        """
+        Calculates characteristics of all the branches. Since omega is constant during the whole solve, this is done only once.
+        Current through a branch without ideal voltage source is y * (V_source - V_sink) + i_s, where admittances y and
+        source currents i_s are stored as arrays. For branches with ideal voltage source, their voltages are stored instead.
 
-    def solve(self, omega: float = 0.) -> tuple[list[Value], dict[int, Value]]:
+        Parameters:
+        -----------
+        omega: float
+            Angular frequency of all the energy sources in the circuit
+        """
+        for branch in self.branches:
+            branch.characteristic = branch.tree.current_voltage_characteristic(omega)
+
+        self._Y = np.zeros(len(self._passive_branches), dtype=np.complex128)
+        self._Is = np.zeros(len(self._passive_branches), dtype=np.complex128)
+        for i, j in enumerate(self._passive_branches):
+            characteristic = self.branches[j].characteristic
+            if characteristic.has_fixed_current:
+                self._Is[i] = characteristic.free_coefficient
+            elif characteristic.has_fixed_voltage:
+                # e.g. an inductor alone in DC mode, which does not have a finite admittance
+                raise RuntimeError(f'Configuration invalid: branch {j} has fixed voltage but no ideal voltage source!')
+            else:
+                self._Y[i] = 1 / characteristic.impedance_coefficient
+                self._Is[i] = -characteristic.free_coefficient * self._Y[i]
+        self._E = np.array([self.branches[j].characteristic.free_coefficient for j in self.current_index], dtype=np.complex128)
+
+    def _solve_directly(self, omega: float) -> list[float]:
+        """
+        Solves the linear system of modified nodal analysis equations in one step.
+
+        Parameters:
+        -----------
+        omega: float
+            Angular frequency of all the energy sources in the circuit
+
+        Returns:
+        Single-element loss history
+        """
+        A, b = self._mna_system()
+        try:
+            # the row and column of the reference node are dropped since its potential is fixed to zero
+            x = np.linalg.solve(A[1:, 1:], b[1:])
+        except np.linalg.LinAlgError:
+            raise RuntimeError('Configuration invalid: circuit does not have a unique solution!')
+        
+        n = len(self.node_index)
+        for i in range(1, n):
+            self._node_values[i].data = complex(x[i-1])
+        for k, current in enumerate(self._vsrc_currents):
+            current.data = complex(x[n+k-1])
+
+        node_I = A[:n, 1:] @ x - b[:n]
+        return [np.vdot(node_I, node_I).real / n]
+
+    def _mna_system(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the matrix A and the right-hand side b of modified nodal analysis equations Ax = b.
+        Each row of the first block states that the net current going out of a node is zero,
+        each row of the second block fixes the voltage across an ideal voltage source.
+        Admittances and source terms calculated by the last call of _init_admittances are used.
+        """
+        A, b = self._mna_systems(self._Y[np.newaxis], self._Is[np.newaxis], self._E[np.newaxis])
+        return A[0], b[0]
+
+    def _mna_systems(self, Y: np.ndarray, Is: np.ndarray, E: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Builds a batch of modified nodal analysis systems, one per row of the given arrays.
+
+        Parameters:
+        -----------
+        Y: np.ndarray
+            Admittances of branches without ideal voltage source, of shape (batch size, number of such branches)
+        Is: np.ndarray
+            Source currents of branches without ideal voltage source, of the same shape as Y
+        E: np.ndarray
+            Voltages of branches with ideal voltage source, of shape (batch size, number of such branches)
+        """
+        K = len(Y)
+        n = len(self.node_index)
+        size = n + len(self.current_index)
+        # admittances are stamped at (src, src), (src, sink), (sink, src), (sink, sink) of the flattened matrices
+        flat_index = np.concatenate((self._src*size + self._src, self._src*size + self._sink, self._sink*size + self._src, self._sink*size + self._sink))
+        batch_offsets = np.arange(K)[:, np.newaxis]
+        A = CircuitSolver._scatter_add((batch_offsets*size*size + flat_index).ravel(), np.concatenate((Y, -Y, -Y, Y), axis=1).ravel(), K*size*size).reshape(K, size, size)
+        b = CircuitSolver._scatter_add((batch_offsets*size + np.concatenate((self._src, self._sink))).ravel(), np.concatenate((-Is, Is), axis=1).ravel(), K*size).reshape(K, size)
+
+        k = np.arange(n, size)
+        A[:, self._vsrc_src, k] += 1
+        A[:, self._vsrc_sink, k] -= 1
+        A[:, k, self._vsrc_src] += 1
+        A[:, k, self._vsrc_sink] -= 1
+        b[:, n:] = E
+        return A, b
+
+    def _minimize_loss(self, omega: float, max_epochs: int = 200) -> list[float]:
         """
-        Finds the correct node voltages and branch currents via loss minimization
+        Finds the node voltages and branch currents via loss minimization.
+        Minimization stops when the largest node current drops below ABS_TOL + REL_TOL * (its initial value),
+        when the loss stagnates or when the largest relative change of parameters drops below PARAMS_TOL.
 
         Parameters:
         -----------
         omega: float
             Angular frequency of all the energy sources in the circuit
+        max_epochs: int
+            Maximum number of epochs
+
+        Returns:
+        Loss history
         """
-        MAX_EPOCHS = int(1e4)
+        ABS_TOL, REL_TOL, STAGNATION_TOL, PARAMS_TOL = 1e-12, 1e-8, 1e-10, 1e-12
         history = []
+        self._init_optimizer(omega)
+        previous_params_data = np.zeros_like(self._params_data)
 
-        for i in range(MAX_EPOCHS):
+        for i in range(max_epochs):
             loss = self._loss(omega)
             history.append(loss.data.real)
 
-            if math.isclose(loss.data.real, 0, abs_tol=1e-30) or (i > 0 and math.isclose(history[-2], loss.data.real, rel_tol=1e-15)):
+            residual_norm = np.max(np.abs(self._residual), initial=0)
+            if i == 0:
+                tolerance = ABS_TOL + REL_TOL * residual_norm
+            if residual_norm < tolerance or (i > 0 and abs(history[-1] - history[-2]) < STAGNATION_TOL * max(history[-1], 1e-30)):
                 break
+            # parameters are gathered into an array by the loss evaluation
+            if i > 0:
+                params_change = np.max(np.abs(self._params_data - previous_params_data), initial=0)
+                if params_change < PARAMS_TOL * (np.max(np.abs(self._params_data), initial=0) + 1e-30):
+                    break
+            np.copyto(previous_params_data, self._params_data)
 
             self.optimizer.zero_grad()
             loss.backward()
             self.optimizer.step(loss.data.real)
             # not forget to update dependent nodes
             self._update_dependent_nodes()
-        
-        self._apply_node_voltages(omega)
 
-        return history, {key: value for key, value in zip(self.node_potentials.keys(), map(lambda v: CircuitSolver._round_complex(v.data), self.node_potentials.values()))}
+        return history
     
     def _loss(self, omega: float) -> Value:
         """
         Calculates the loss for current values of node voltages (and fixed-voltage branch currents).
         First, the net current going out of the node is calculated for each node
-        Second, these values are squared and an average is evaluated across all nodes
+        Second, absolute values of these are squared and an average is evaluated across all nodes
+        Node currents are evaluated via the constant Jacobian, so the gradient is propagated to learnable parameters analytically.
 
         Parameters:
         -----------
@@ -207,20 +462,23 @@ class CircuitSolver():
             Angular frequency of all the energy sources in the circuit
 
         Returns:
-        loss: float
+        loss: Value
         """
-        for node_id in self.node_potentials:
-            self.node_currents[node_id] = 0.
-        for j, branch in enumerate(self.branches):
-            if branch.components.component_type == ComponentType.IDEAL_VOLTAGE_SOURCE:
-                branch.components.apply_current(self.branch_currents[j], recursive=False)
-            else:
-                voltage_diff = self.node_potentials[branch.source]-self.node_potentials[branch.sink]
-                branch.components.apply_voltage(voltage_diff, omega, recursive=False)
-            self.node_currents[branch.source] += branch.components.current
-            self.node_currents[branch.sink] -= branch.components.current
+        for p, param in enumerate(self.learnable_params):
+            self._params_data[p] = param.data
+        node_I = np.matmul(self._jacobian, self._params_data, out=self._residual)
+        node_I += self._residual_offset
+
+        n = len(node_I)
+        loss = Value(np.vdot(node_I, node_I).real / n, self._loss_params, 'loss')
+
+        def _backward():
+            grad = self._jacobian.T @ (2 * node_I.conj() * loss.grad.real / n)
+            for param, g in zip(self.learnable_params, grad.tolist()):
+                param.grad += g
+        loss._backward = _backward
 
-        return sum([abs(c) for c in self.node_currents.values()]) / len(self.node_currents)
+        return loss
 
     def _apply_node_voltages(self, omega: float = 0):
         """
@@ -232,13 +490,11 @@ class CircuitSolver():
         omega: float
             Angular frequency of all the energy sources in the circuit
         """
-        for branch in self.branches:
-            if branch.components.component_type == ComponentType.IDEAL_VOLTAGE_SOURCE:
-                continue
-            voltage_diff = self.node_potentials[branch.source].data - self.node_potentials[branch.sink].data
-            branch.components.apply_voltage(voltage_diff, omega, recursive=True)
-        for branch_id, current in self.branch_currents.items():
-            self.branches[branch_id].components.apply_current(current.data, omega, recursive=True)
+        V = np.array([node.data for node in self._node_values], dtype=np.complex128)
+        for j, voltage_diff in zip(self._passive_branches, (V[self._src] - V[self._sink]).tolist()):
+            self.branches[j].tree.apply_voltage(voltage_diff, omega, recursive=True)
+        for branch_id, current in zip(self.current_index, self._vsrc_currents):
+            self.branches[branch_id].tree.apply_current(current.data, omega, recursive=True)
 
     def state_at(self, label: str) -> tuple[complex, complex] | None:
         """
@@ -246,6 +502,23 @@ class CircuitSolver():
         """
         return None if label not in self.components or self.components[label].state is None else (CircuitSolver._round_complex(self.components[label].state[0]), CircuitSolver._round_complex(self.components[label].state[1]))
     
+    @staticmethod
+    def _scatter_add(index: np.ndarray, values: np.ndarray, length: int) -> np.ndarray:
+        """
+        Sums complex values sharing the same index into an array of a given length.
+        Equivalent to np.add.at on a zero array, but much faster since np.bincount is used.
+
+        Parameters:
+        -----------
+        index: np.ndarray
+            Target index of each value
+        values: np.ndarray
+            Complex values to be summed
+        length: int
+            Length of the resulting array
+        """
+        return np.bincount(index, values.real, length) + 1j * np.bincount(index, values.imag, length)
+
     @staticmethod
     def _round_complex(value: complex, ndigits: int = 5) -> complex:
         """
@@ -1,5 +1,7 @@
+from dataclasses import dataclass
 from micrograd import Value
 
+@dataclass(slots=True, frozen=True)
 class CurrentVoltageCharacteristic():
     """
     Represents a linear current-voltage characteristic of the form a * V + b * I = c.
@@ -7,16 +9,12 @@ class CurrentVoltageCharacteristic():
     1) I = c,            used for constant current electric components;
     2) V + b * I = c,    used for other types of electric components.
     Coefficient 'b' and 'c' are complex numbers so both DC and AC mode is supported.
+    Characteristics are immutable, so they can be shared freely.
     """
     a: bool
     b: complex
     c: complex
 
-    def __init__(self, a: bool, b: complex, c: complex) -> None:
-        self.a = a
-        self.b = b
-        self.c = c
-
     def __str__(self) -> str:
         if self.has_fixed_current:
             return f'I = {self.c}'
@@ -110,10 +108,12 @@ class CurrentVoltageCharacteristic():
             if other.has_fixed_current:
                 return CurrentVoltageCharacteristic(True, self.b, self.c + self.b * other.c)
             else:
+                # both coefficients share the same denominator, so it is inverted only once
+                inv = 1 / (self.b + other.b)
                 return CurrentVoltageCharacteristic(
                     True,
-                    (self.b * other.b) / (self.b + other.b),
-                    (self.c * other.b + other.c * self.b) / (self.b + other.b)
+                    self.b * other.b * inv,
+                    (self.c * other.b + other.c * self.b) * inv
                 )
     
     @staticmethod
@@ -121,11 +121,14 @@ class CurrentVoltageCharacteristic():
         """
         Returns the current-voltage characteristic of open circuit.
         """
-        return CurrentVoltageCharacteristic(False, complex(1, 0), complex(0,0))
+        return _OPEN_CIRCUIT
     
     @staticmethod
     def short_circuit() -> 'CurrentVoltageCharacteristic':
         """
         Returns the current-voltage characteristic of short circuit.
         """
-        return CurrentVoltageCharacteristic(True, complex(0,0), complex(0,0))
\ No newline at end of file
+        return _SHORT_CIRCUIT
+
+_OPEN_CIRCUIT = CurrentVoltageCharacteristic(False, complex(1, 0), complex(0,0))
+_SHORT_CIRCUIT = CurrentVoltageCharacteristic(True, complex(0,0), complex(0,0))
\ No newline at end of file
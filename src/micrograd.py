@@ -1,97 +1,58 @@
 from typing import Union
 from cmath import phase
+
+__all__ = ['Value']
+
 class Value:
     """
     Stores a single scalar complex value and its gradient.
     Gradient is stored as d/dx - i d/dy, where x and y are real and imaginary part, respectively
     """
+    __slots__ = ('data', 'grad', 'requires_grad', '_backward', '_prev', '_op')
 
-    def __init__(self, data: complex, _children: tuple['Value', Union['Value', complex]]=(), _op=''):
+    def __init__(self, data: complex, _children: tuple['Value', Union['Value', complex]]=(), _op='', requires_grad: bool = True):
         self.data: complex = complex(data)
         self.grad: complex = 0
+        if _children:
+            # results of ops on constants only are constants as well, so their lineage is pruned from the graph
+            # and they become leaves
+            requires_grad = any(child.requires_grad for child in _children if isinstance(child, Value))
+            if not requires_grad:
+                _children, _op = (), ''
+        self.requires_grad = requires_grad
         # internal variables used for autograd graph construction
-        self._backward = lambda: None
+        # gradient of built-in ops is propagated by a shared function looked up by _op, so no closure is allocated per node
+        # _backward is only set for nodes with a custom gradient
+        self._backward = None
         self._prev = _children
         self._op = _op # the op that produced this node, for graphviz / debugging / etc
 
     def __add__(self, other):
-        if isinstance(other, Value):
-            out = Value(self.data + other.data, (self, other), '+')
-
-            def _backward():
-                self.grad += out.grad
-                other.grad += out.grad
-            out._backward = _backward
-        else:
-            out = Value(self.data + other, (self,other), '+')
-
-            def _backward():
-                self.grad += out.grad
-            out._backward = _backward
-        return out
+        # exact type test is cheaper than isinstance and Value is never subclassed
+        return Value(self.data + (other.data if type(other) is Value else other), (self, other), '+')
 
     def __mul__(self, other):
-        if isinstance(other, Value):
-            out = Value(self.data * other.data, (self, other), '*')
-
-            def _backward():
-                self.grad += other.data*out.grad
-                other.grad += self.data*out.grad
-            out._backward = _backward
-        else:
-            out = Value(self.data * other, (self, other), '*')
-
-            def _backward():
-                self.grad += other*out.grad
-            out._backward = _backward
-        return out
-
+        return Value(self.data * (other.data if type(other) is Value else other), (self, other), '*')
 
     def __truediv__(self, other):
         assert isinstance(other, (int, float, complex)), "only supporting division by int/float/complex"
-        out = Value(self.data/other, (self,), f'/{other}')
-
-        def _backward():
-            self.grad += out.grad / other
-        out._backward = _backward
-
-        return out
+        return Value(self.data/other, (self, other), '/')
     
     def __abs__(self):
-        out = Value(abs(self.data)**2, (self,), f'.abs')
-
-        def _backward():
-            self.grad += 2 * self.data.conjugate() * out.grad.real
-        out._backward = _backward
-
-        return out
+        # squared magnitude is smooth everywhere, unlike the magnitude itself
+        return self.abs_sq()
+    
+    def abs_sq(self):
+        return Value(self.data.real*self.data.real + self.data.imag*self.data.imag, (self,), '.abs')
     
     def real(self):
-        out = Value(self.data.real, (self,), f'.real')
-
-        def _backward():
-            self.grad += out.grad.real
-        out._backward = _backward
-
-        return out
+        return Value(self.data.real, (self,), '.real')
     
     def imag(self):
-        out = Value(1j*self.data.imag, (self,), f'.imag')
-
-        def _backward():
-            self.grad += -1j*out.grad.real
-        out._backward = _backward
-
-        return out
+        return Value(1j*self.data.imag, (self,), '.imag')
     
     def phase(self):
-        out = Value(phase(self.data), (self,), f'.phase')
-
-        def _backward():
-            self.grad += -out.grad.real * (self.data.imag+self.data.real*1j) / abs(self.data)**2
-        out._backward = _backward
-
-        return out
+        return Value(phase(self.data), (self,), '.phase')
 
     @property
     def is_leaf(self):
@@ -102,23 +63,32 @@ class Value:
         return self._prev
     
     def backward(self):
+        if not self.requires_grad:
+            return
 
         # topological order all of the children in the graph
+        # explicit stack is used instead of recursion, so long chains of operations do not exceed recursion limit
         topo = []
         visited = set()
-        def build_topo(v):
-            if v not in visited:
-                visited.add(v)
-                for child in set(v._prev):
-                    if isinstance(child, Value):
-                        build_topo(child)
+        stack = [(self, False)]
+        while stack:
+            v, children_visited = stack.pop()
+            if children_visited:
                 topo.append(v)
-        build_topo(self)
+            elif v not in visited:
+                visited.add(v)
+                stack.append((v, True))
+                for child in v._prev:
+                    if isinstance(child, Value) and child.requires_grad and child not in visited:
+                        stack.append((child, False))
 
         # go one variable at a time and apply the chain rule to get its gradient
         self.grad = 1
         for v in reversed(topo):
-            v._backward()
+            if v._backward is None:
+                _BACKWARDS[v._op](v)
+            else:
+                v._backward()
 
     def __neg__(self): # -self
         return self * -1
@@ -136,4 +106,58 @@ class Value:
         return self * other
 
     def __repr__(self):
-        return f"Value(data={self.data}, grad={self.grad})"
\ No newline at end of file
+        return f"Value(data={self.data}, grad={self.grad})"
+
+# ops with a single operand produce a node which requires gradient only if its operand does, so only binary ops check it
+def _add_backward(out: Value) -> None:
+    self, other = out._prev
+    if self.requires_grad:
+        self.grad += out.grad
+    if type(other) is Value and other.requires_grad:
+        other.grad += out.grad
+
+def _mul_backward(out: Value) -> None:
+    self, other = out._prev
+    if type(other) is Value:
+        if self.requires_grad:
+            self.grad += other.data*out.grad
+        if other.requires_grad:
+            other.grad += self.data*out.grad
+    else:
+        self.grad += other*out.grad
+
+def _div_backward(out: Value) -> None:
+    self, other = out._prev
+    self.grad += out.grad / other
+
+def _abs_backward(out: Value) -> None:
+    self, = out._prev
+    d = self.data
+    self.grad += 2 * complex(d.real, -d.imag) * out.grad.real
+
+def _real_backward(out: Value) -> None:
+    self, = out._prev
+    self.grad += out.grad.real
+
+def _imag_backward(out: Value) -> None:
+    self, = out._prev
+    self.grad += -1j*out.grad.real
+
+def _phase_backward(out: Value) -> None:
+    self, = out._prev
+    d = self.data
+    self.grad += -out.grad.real * complex(d.imag, d.real) / (d.real*d.real + d.imag*d.imag)
+
+def _leaf_backward(out: Value) -> None:
+    pass
+
+_BACKWARDS = {
+    '': _leaf_backward,
+    '+': _add_backward,
+    '*': _mul_backward,
+    '/': _div_backward,
+    '.abs': _abs_backward,
+    '.real': _real_backward,
+    '.imag': _imag_backward,
+    '.phase': _phase_backward,
+}
\ No newline at end of file
@@ -1,6 +1,8 @@
 from current_voltage_characteristic import CurrentVoltageCharacteristic, Value
 from enum import Enum
 from si_units import *
+from weakref import WeakSet
+import numpy as np
 
 class ComponentType(Enum):
     IDEAL_VOLTAGE_SOURCE = 1
@@ -16,14 +18,20 @@ class TwoTerminalComponent():
     """
     Base class representing linear electric components with two terminals (ends). 
     """
-    characteristic: CurrentVoltageCharacteristic
+    __slots__ = ('characteristics', 'parents', 'state', 'label', '__weakref__')
+    characteristics: dict[float, CurrentVoltageCharacteristic]
+    parents: WeakSet
     state: tuple[complex, complex] | tuple[Value, Value]
-    omega: float
     label: str
+    component_type: ComponentType = None
+    frequency_dependent: bool = True
 
     def __init__(self, label: str) -> None:
         self.label = label
-        self.characteristic = None
+        self.characteristics = dict()
+        # composites containing this component, whose cached characteristics depend on it
+        self.parents = WeakSet()
+        self.state = None
     
     @property
     def current(self) -> complex | Value:
@@ -39,10 +47,6 @@ class TwoTerminalComponent():
         """
         return self.state[1] if self.state else None
     
-    @property
-    def component_type(self) -> ComponentType:
-        pass
-
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         """
         Calculates current-voltage characteristic.
@@ -56,9 +60,26 @@ class TwoTerminalComponent():
         """
         pass
 
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculates current-voltage characteristics at multiple angular frequencies at once.
+        
+        Parameters:
+        -----------
+        omegas: np.ndarray
+            Angular frequencies at which current-voltage characteristics ought to be calculated
+        Returns:
+        Coefficients a, b and c of current-voltage characteristics, each as an array of the same length as omegas
+        """
+        characteristics = [self.calculate_current_voltage_characteristic(omega) for omega in omegas.tolist()]
+        return (np.array([characteristic.a for characteristic in characteristics], dtype=bool),
+                np.array([characteristic.b for characteristic in characteristics], dtype=np.complex128),
+                np.array([characteristic.c for characteristic in characteristics], dtype=np.complex128))
+
     def current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         """
         Returns current-voltage characteristic. If it was already calculated earlier for the provided omega, it is not calculated again, but cached object is returned.
+        Characteristics are cached for every omega, so frequency sweeps do not invalidate each other.
         
         Parameters:
         -----------
@@ -67,10 +88,34 @@ class TwoTerminalComponent():
         Returns:
         Current-voltage characteristic
         """
-        if self.characteristic is None or self.omega != omega:
-            self.omega = omega
-            self.characteristic = self.calculate_current_voltage_characteristic(omega)
-        return self.characteristic  
+        if not self.frequency_dependent:
+            # a single characteristic is valid for all omegas
+            omega = None
+        characteristic = self.characteristics.get(omega)
+        if characteristic is None:
+            characteristic = self.calculate_current_voltage_characteristic(omega)
+            self.characteristics[omega] = characteristic
+        return characteristic
+
+    def clear_cache(self) -> None:
+        """
+        Discards all cached current-voltage characteristics. There is no need to call it after a change of the circuit,
+        since changed components invalidate their own caches and the caches of all the composites containing them.
+        """
+        self.characteristics.clear()
+
+    def invalidate_cache(self) -> None:
+        """
+        Discards cached current-voltage characteristics of this component and of all the composites containing it.
+        """
+        # components may be shared by several composites, so each of them is visited only once
+        stack, visited = [self], set()
+        while stack:
+            component = stack.pop()
+            if component not in visited:
+                visited.add(component)
+                component.characteristics.clear()
+                stack.extend(component.parents)
     
     def apply_current(self, current: Value | complex, omega: float = 0, recursive: bool = True) -> None:
         """
@@ -109,6 +154,12 @@ class TwoTerminalComponent():
         Returns the component flipped.
         """
         return self
+
+    def traverse(self):
+        """
+        Iterates over all the leaf (non-composite) components this component consists of.
+        """
+        yield self
     
     def in_series_with(self, other) -> 'TwoTerminalComponent':
         """
@@ -117,9 +168,9 @@ class TwoTerminalComponent():
         Returns:
         Resulting component
         """
-        if other.component_type == ComponentType.SERIES:
+        if isinstance(other, Series):
             return other.in_series_with(self)
-        return Series().add_component(self).add_component(other)
+        return Series().add_components((self, other))
     
     def in_parallel_with(self, other) -> 'TwoTerminalComponent':
         """
@@ -128,9 +179,9 @@ class TwoTerminalComponent():
         Returns:
         Resulting component
         """
-        if other.component_type == ComponentType.PARALLEL:
+        if isinstance(other, Parallel):
             return other.in_parallel_with(self)
-        return Parallel().add_component(self).add_component(other)
+        return Parallel().add_components((self, other))
     
     def __invert__(self):
         return self.reverse()
@@ -157,26 +208,47 @@ class ComplexValuedTwoTerminalComponent(TwoTerminalComponent):
     """
     Base class for linear electric components which have to be characterized by a complex value.
     """
-    value: complex
+    __slots__ = ('_value',)
+    _value: complex
 
     def __init__(self, label: str, value: complex, unit: SIPrefix = SIPrefix.Nil) -> None:
         super().__init__(label)
-        self.value = value * get_prefix_value(unit)
+        self.value = value * unit
+
+    @property
+    def value(self) -> complex:
+        return self._value
+
+    @value.setter
+    def value(self, new_value: complex):
+        self._value = new_value
+        self.invalidate_cache() # force new calculation
 
 class RealValuedTwoTerminalComponent(TwoTerminalComponent):
     """
     Base class for linear electric components which can be characterized by a real value.
     """
-    value: float
+    __slots__ = ('_value',)
+    _value: float
 
     def __init__(self, label: str, value: float, unit: SIPrefix = SIPrefix.Nil) -> None:
         super().__init__(label)
-        self.value = value * get_prefix_value(unit)
+        self.value = value * unit
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, new_value: float):
+        self._value = new_value
+        self.invalidate_cache() # force new calculation
 
 class CompositeTwoTerminalComponent(TwoTerminalComponent):
     """
     Base class for linear electric components which consist of other linear electric components.
     """
+    __slots__ = ('components',)
     components: list[TwoTerminalComponent]
 
     def __init__(self, label: str) -> None:
@@ -186,13 +258,78 @@ class CompositeTwoTerminalComponent(TwoTerminalComponent):
     def add_component(self, component: TwoTerminalComponent):
         pass
 
+    def add_components(self, components: list[TwoTerminalComponent]):
+        """
+        Adds all the given components in place, merging nested composites of the same kind.
+
+        Returns:
+        This component
+        """
+        for component in components:
+            self.add_component(component)
+        return self
+
     def remove_component(self, component: TwoTerminalComponent):
         pass
 
+    @property
+    def children(self) -> list[TwoTerminalComponent]:
+        """
+        Returns all the components this component consists of, including the fixed current or voltage one.
+        """
+        return self.components
+
+    def clear_cache(self) -> None:
+        super().clear_cache()
+        for component in self.children:
+            component.clear_cache()
+
+    def _adopt(self, component: TwoTerminalComponent) -> None:
+        component.parents.add(self)
+
+    def _disown(self, component: TwoTerminalComponent) -> None:
+        # the same component may have been added more than once
+        if component not in self.children:
+            component.parents.discard(self)
+
+    def traverse(self):
+        # explicit stack is used instead of nested generators, so each leaf is yielded directly
+        stack = [self]
+        while stack:
+            component = stack.pop()
+            if isinstance(component, CompositeTwoTerminalComponent):
+                stack.extend(reversed(component.children))
+            else:
+                yield component
+
+    def reverse(self):
+        # the tree is walked with an explicit stack, so deep trees do not exceed recursion limit
+        # only sources change when reversed, and they invalidate the caches of all the composites containing them
+        stack = [self]
+        while stack:
+            component = stack.pop()
+            if isinstance(component, CompositeTwoTerminalComponent):
+                stack.extend(component.children)
+            else:
+                component.reverse()
+        return self
+
+    @classmethod
+    def from_iterable(cls, components: list[TwoTerminalComponent], label: str = None) -> 'CompositeTwoTerminalComponent':
+        """
+        Combines all the given components in one pass, without creating intermediate composites.
+
+        Returns:
+        Resulting component
+        """
+        return cls(label).add_components(components)
+
 class IdealVoltageSource(ComplexValuedTwoTerminalComponent):
     """
     Represents an ideal voltage source. It is characterized by electromotive force (in AC mode this means both amplitude and phase).
     """
+    __slots__ = ()
+
     @property
     def emf(self) -> complex:
         return self.value
@@ -201,143 +338,200 @@ class IdealVoltageSource(ComplexValuedTwoTerminalComponent):
     def emf(self, new_value):
         self.value = new_value
 
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.IDEAL_VOLTAGE_SOURCE
+    component_type = ComponentType.IDEAL_VOLTAGE_SOURCE
+    frequency_dependent = False
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         return CurrentVoltageCharacteristic(True, 0, self.value)
     
     def reverse(self):
         self.value = -self.value
-        self.characteristic = None # force new calculation
         return self
 
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.ones(len(omegas), dtype=bool), np.zeros(len(omegas), dtype=np.complex128), np.full(len(omegas), self.value, dtype=np.complex128)
+
 class IdealCurrentSource(ComplexValuedTwoTerminalComponent):
     """
     Represents an ideal current source. It is characterized by current strength (in AC mode this means both amplitude and phase).
     """
+    __slots__ = ()
+
     @property
     def amperage(self) -> complex:
         return self.value
     
     @amperage.setter
-    def emf(self, new_value):
+    def amperage(self, new_value):
         self.value = new_value
 
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.IDEAL_CURRENT_SOURCE
+    component_type = ComponentType.IDEAL_CURRENT_SOURCE
+    frequency_dependent = False
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         return CurrentVoltageCharacteristic(False, 1, self.value)
     
     def reverse(self):
         self.value = -self.value
-        self.characteristic = None # force new calculation
         return self
-    
+
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.zeros(len(omegas), dtype=bool), np.ones(len(omegas), dtype=np.complex128), np.full(len(omegas), self.value, dtype=np.complex128)
+
 class Resistor(RealValuedTwoTerminalComponent):
     """
     Represents a resistor. It is characterized by its resistance.
     """
+    __slots__ = ()
+
     @property
     def resistance(self) -> float:
         return self.value
     
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.RESISTOR
+    component_type = ComponentType.RESISTOR
+    frequency_dependent = False
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         return CurrentVoltageCharacteristic(True, -self.value, 0)
     
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.ones(len(omegas), dtype=bool), np.full(len(omegas), -self.value, dtype=np.complex128), np.zeros(len(omegas), dtype=np.complex128)
+    
 class Capacitor(RealValuedTwoTerminalComponent):
     """
     Represents a capacitor. It is characterized by its capacitance.
     """
+    __slots__ = ()
+
     @property
     def capacitance(self) -> float:
         return self.value
     
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.CAPACITOR
+    component_type = ComponentType.CAPACITOR
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         assert not self.value == 0
         return CurrentVoltageCharacteristic.open_circuit() if omega == 0 else CurrentVoltageCharacteristic(True, 1j/(omega*self.value), 0)
-    
+
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        assert not self.value == 0
+        # capacitor is an open circuit in DC mode
+        dc = omegas == 0
+        b = np.where(dc, 1, 1j/(np.where(dc, 1, omegas)*self.value))
+        return ~dc, b.astype(np.complex128), np.zeros(len(omegas), dtype=np.complex128)
+
 class Inductor(RealValuedTwoTerminalComponent):
     """
     Represents an inductor. It is characterized by its inductance.
     """
+    __slots__ = ()
+
     @property
     def inductance(self) -> float:
         return self.value
     
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.INDUCTOR
+    component_type = ComponentType.INDUCTOR
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         return CurrentVoltageCharacteristic.short_circuit() if omega == 0 else CurrentVoltageCharacteristic(True, -1j*omega*self.value, 0)
 
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # in DC mode, b is zero and inductor is a short circuit
+        return np.ones(len(omegas), dtype=bool), (-1j*self.value)*omegas.astype(np.complex128), np.zeros(len(omegas), dtype=np.complex128)
+
 class Impedance(ComplexValuedTwoTerminalComponent):
     """
     Represents a general passive element. It is characterized by its impedance.
     """
+    __slots__ = ()
+
     @property
     def impedance(self) -> float:
         return self.value
     
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.IMPEDANCE
+    component_type = ComponentType.IMPEDANCE
+    frequency_dependent = False
     
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         return CurrentVoltageCharacteristic(True, -self.value, 0)
 
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return np.ones(len(omegas), dtype=bool), np.full(len(omegas), -self.value, dtype=np.complex128), np.zeros(len(omegas), dtype=np.complex128)
+
 class Series(CompositeTwoTerminalComponent):
     """
     Represents a multitude of components connected in series.
     """
+    __slots__ = ('fixed_current_component',)
     fixed_current_component: TwoTerminalComponent
 
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.SERIES
+    component_type = ComponentType.SERIES
     
     def __init__(self, label: str = None) -> None:
         super().__init__(label)
         self.fixed_current_component = None
 
     def add_component(self, component: TwoTerminalComponent):
-        if component.component_type == ComponentType.IDEAL_CURRENT_SOURCE:
+        if isinstance(component, Series):
+            # nested series is merged instead of being added as a single component
+            for child in component.components:
+                self._adopt(child)
+            self.components.extend(component.components)
+            if component.fixed_current_component:
+                self.add_component(component.fixed_current_component)
+        elif isinstance(component, IdealCurrentSource):
             if self.fixed_current_component is None:
                 self.fixed_current_component = component
+                self._adopt(component)
             else:
                 raise Exception('Two ideal current sources cannot be connected in series!')
         else:
             self.components.append(component)
+            self._adopt(component)
+        self.invalidate_cache()
         return self
 
     def remove_component(self, component: TwoTerminalComponent):
-        if component.component_type == self.fixed_current_component:
+        if component is self.fixed_current_component:
             self.fixed_current_component = None
         else:
             self.components.remove(component)
+        self._disown(component)
+        self.invalidate_cache()
         return self
         
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         if self.fixed_current_component:
             return self.fixed_current_component.current_voltage_characteristic(omega)
-        elif self.components is None:
-            return CurrentVoltageCharacteristic.short_circuit()
-        characterstic = CurrentVoltageCharacteristic.short_circuit()
+        # voltages of the components add up, so coefficients are accumulated directly
+        b, c = complex(0, 0), complex(0, 0)
+        fixed_current_characteristic = None
         for component in self.components:
-            characterstic = characterstic & component.current_voltage_characteristic(omega)
-        return characterstic
+            characteristic = component.current_voltage_characteristic(omega)
+            if characteristic.has_fixed_current:
+                if fixed_current_characteristic is not None:
+                    raise Exception('Cannot add two constant-current components in series')
+                fixed_current_characteristic = characteristic
+            else:
+                b += characteristic.b
+                c += characteristic.c
+        return fixed_current_characteristic or CurrentVoltageCharacteristic(True, b, c)
+
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.fixed_current_component:
+            return self.fixed_current_component.calculate_current_voltage_characteristics(omegas)
+        a = np.ones(len(omegas), dtype=bool)
+        b = np.zeros(len(omegas), dtype=np.complex128)
+        c = np.zeros(len(omegas), dtype=np.complex128)
+        for component in self.components:
+            component_a, component_b, component_c = component.calculate_current_voltage_characteristics(omegas)
+            if np.any(~a & ~component_a):
+                raise Exception('Cannot add two constant-current components in series')
+            # where a component has fixed current, its characteristic becomes the characteristic of the series
+            b = np.where(component_a, np.where(a, b + component_b, b), component_b)
+            c = np.where(component_a, np.where(a, c + component_c, c), component_c)
+            a &= component_a
+        return a, b, c
     
     def apply_current(self, current: Value | complex, omega: float, recursive: bool = True):
         if self.fixed_current_component:
@@ -353,67 +547,111 @@ class Series(CompositeTwoTerminalComponent):
         if not recursive:
             return
         for component in self.components:
-            component.apply_current(self.current, omega)
-            voltage -= component.voltage
+            component.apply_current(self.current, omega, recursive)
         if self.fixed_current_component:
-            self.fixed_current_component.apply_voltage(voltage, omega, recursive)
+            # the remaining voltage is needed only for the fixed-current component, so it is not accumulated otherwise
+            self.fixed_current_component.apply_voltage(voltage - sum(component.voltage for component in self.components), omega, recursive)
 
-    def reverse(self):
-        for component in self.components:
-            component.reverse()
-        if self.fixed_current_component:
-            self.fixed_current_component.reverse()
-        if self.characteristic:
-            self.characteristic = ~self.characteristic
+    @property
+    def children(self) -> list[TwoTerminalComponent]:
+        return self.components + [self.fixed_current_component] if self.fixed_current_component else self.components
 
     def in_series_with(self, other: TwoTerminalComponent):
-        if other.component_type == ComponentType.SERIES:
-            for component in other.components:
-                self.add_component(component)
-        else:
-            self.add_component(other)
-        return self
+        return self.add_component(other)
 
 class Parallel(CompositeTwoTerminalComponent):
     """
     Represents a multitude of components connected in parallel.
     """
+    __slots__ = ('fixed_voltage_component',)
     fixed_voltage_component: TwoTerminalComponent
 
-    @property
-    def component_type(self) -> ComponentType:
-        return ComponentType.PARALLEL
+    component_type = ComponentType.PARALLEL
     
     def __init__(self, label: str = None) -> None:
         super().__init__(label)
         self.fixed_voltage_component = None
 
     def add_component(self, component: TwoTerminalComponent):
-        if component.component_type == ComponentType.IDEAL_VOLTAGE_SOURCE:
+        if isinstance(component, Parallel):
+            # nested parallel is merged instead of being added as a single component
+            for child in component.components:
+                self._adopt(child)
+            self.components.extend(component.components)
+            if component.fixed_voltage_component:
+                self.add_component(component.fixed_voltage_component)
+        elif isinstance(component, IdealVoltageSource):
             if self.fixed_voltage_component is None:
                 self.fixed_voltage_component = component
+                self._adopt(component)
             else:
                 raise Exception('Two ideal voltage sources cannot be connected in parallel!')
         else:
             self.components.append(component)
+            self._adopt(component)
+        self.invalidate_cache()
         return self
 
     def remove_component(self, component: TwoTerminalComponent):
-        if component.component_type == self.fixed_voltage_component:
+        if component is self.fixed_voltage_component:
             self.fixed_voltage_component = None
         else:
             self.components.remove(component)
+        self._disown(component)
+        self.invalidate_cache()
         return self
         
     def calculate_current_voltage_characteristic(self, omega: float) -> CurrentVoltageCharacteristic:
         if self.fixed_voltage_component:
             return self.fixed_voltage_component.current_voltage_characteristic(omega)
-        elif self.components is None:
-            return CurrentVoltageCharacteristic.open_circuit()
-        characterstic = CurrentVoltageCharacteristic.open_circuit()
+        # currents of the components add up, I = sum(c/b) - V * sum(1/b), so admittances are accumulated and divided only once
+        admittance, current = complex(0, 0), complex(0, 0)
+        has_admittance = False
+        fixed_voltage_characteristic = None
+        for component in self.components:
+            characteristic = component.current_voltage_characteristic(omega)
+            if characteristic.has_fixed_current:
+                current += characteristic.c
+            elif characteristic.has_fixed_voltage:
+                if fixed_voltage_characteristic is not None:
+                    raise Exception('Cannot add two constant-voltage components in parallel')
+                fixed_voltage_characteristic = characteristic
+            else:
+                y = 1 / characteristic.b
+                admittance += y
+                current += characteristic.c * y
+                has_admittance = True
+        if fixed_voltage_characteristic:
+            return fixed_voltage_characteristic
+        if not has_admittance:
+            return CurrentVoltageCharacteristic(False, 1, current)
+        b = 1 / admittance
+        return CurrentVoltageCharacteristic(True, b, current * b)
+
+    def calculate_current_voltage_characteristics(self, omegas: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.fixed_voltage_component:
+            return self.fixed_voltage_component.calculate_current_voltage_characteristics(omegas)
+        admittance = np.zeros(len(omegas), dtype=np.complex128)
+        current = np.zeros(len(omegas), dtype=np.complex128)
+        has_admittance = np.zeros(len(omegas), dtype=bool)
+        has_fixed_voltage = np.zeros(len(omegas), dtype=bool)
+        fixed_voltage = np.zeros(len(omegas), dtype=np.complex128)
         for component in self.components:
-            characterstic = characterstic | component.current_voltage_characteristic(omega)
-        return characterstic
+            component_a, component_b, component_c = component.calculate_current_voltage_characteristics(omegas)
+            component_has_fixed_voltage = component_a & (component_b == 0)
+            if np.any(has_fixed_voltage & component_has_fixed_voltage):
+                raise Exception('Cannot add two constant-voltage components in parallel')
+            has_fixed_voltage |= component_has_fixed_voltage
+            fixed_voltage = np.where(component_has_fixed_voltage, component_c, fixed_voltage)
+            current += np.where(component_a, 0, component_c)
+            passive = component_a & ~component_has_fixed_voltage
+            y = np.divide(1, component_b, out=np.zeros_like(component_b), where=passive)
+            admittance += y
+            current += component_c * y
+            has_admittance |= passive
+        b = np.divide(1, admittance, out=np.ones_like(admittance), where=has_admittance)
+        c = np.where(has_admittance, current * b, current)
+        return has_fixed_voltage | has_admittance, np.where(has_fixed_voltage, 0, b), np.where(has_fixed_voltage, fixed_voltage, c)
     
     def apply_current(self, current: Value | complex, omega: float, recursive: bool = True):
         super().apply_current(current, omega)
@@ -421,9 +659,9 @@ class Parallel(CompositeTwoTerminalComponent):
             return
         for component in self.components:
             component.apply_voltage(self.voltage, omega, recursive)
-            current -= component.current
         if self.fixed_voltage_component:
-            self.fixed_voltage_component.apply_current(current, omega, recursive)
+            # the remaining current is needed only for the fixed-voltage component, so it is not accumulated otherwise
+            self.fixed_voltage_component.apply_current(current - sum(component.current for component in self.components), omega, recursive)
 
     def apply_voltage(self, voltage: Value | complex, omega: float = 0, recursive: bool = True):
         if self.fixed_voltage_component:
@@ -434,18 +672,9 @@ class Parallel(CompositeTwoTerminalComponent):
         for component in self.components:
             component.apply_voltage(voltage, omega, recursive)
 
-    def reverse(self):
-        for component in self.components:
-            component.reverse()
-        if self.fixed_voltage_component:
-            self.fixed_voltage_component.reverse()
-        if self.characteristic:
-            self.characteristic = ~self.characteristic
+    @property
+    def children(self) -> list[TwoTerminalComponent]:
+        return self.components + [self.fixed_voltage_component] if self.fixed_voltage_component else self.components
 
     def in_parallel_with(self, other: TwoTerminalComponent):
-        if other.component_type == ComponentType.PARALLEL:
-            for component in other.components:
-                self.add_component(component)
-        else:
-            self.add_component(other)
-        return self
\ No newline at end of file
+        return self.add_component(other)
\ No newline at end of file
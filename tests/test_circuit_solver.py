@@ -2,6 +2,7 @@ import sys
 sys.path.append("./src")
 from circuit_solver import *
 from cmath import isclose
+import pytest
 
 
 class TestCircuitSolver():
@@ -50,7 +51,53 @@ class TestCircuitSolver():
 
         assert isclose(j2.voltage, -11./3)
 
-    def test_mitic_12_7(self):
+    def test_init_nodes(self):
+        r1 = Resistor('R1', 100)
+        r2 = Resistor('R2', 100)
+        e1 = IdealVoltageSource('E1', 5)
+        e2 = IdealVoltageSource('E2', 3)
+
+        branches = [
+            Branch(1, 2, [r1, r2]),
+            Branch(2, 3, [e1]),
+            Branch(3, 1, [r1]),
+            Branch(4, 3, [e2])
+        ]
+
+        circuit = CircuitSolver(branches)
+        assert isinstance(branches[0].tree, Series)
+        assert branches[1].tree is e1
+        # source of the first ideal voltage source is the reference node, nodes across voltage sources follow it
+        assert circuit.reference_node == 2
+        assert list(circuit.node_index) == [2, 3, 4, 1]
+        assert circuit.current_index == {1: 4, 3: 5}
+        potentials = circuit.node_potentials
+        assert potentials[2].data == 0
+        assert potentials[3].data == -5
+        assert potentials[4].data == -2
+        assert not potentials[3].is_leaf and not potentials[4].is_leaf
+        assert circuit.learnable_params == [potentials[1], circuit.branch_currents[1], circuit.branch_currents[3]]
+
+        branches.append(Branch(2, 4, [IdealVoltageSource('E3', 1)]))
+        with pytest.raises(RuntimeError, match='Configuration invalid'):
+            CircuitSolver(branches)
+
+    @pytest.mark.parametrize('branches', [
+        # consistent ideal voltage sources in parallel
+        [Branch(1, 2, [IdealVoltageSource('E1', 5)]), Branch(1, 2, [IdealVoltageSource('E2', 5)]), Branch(2, 1, [Resistor('R', 10)])],
+        # floating subcircuit
+        [Branch(1, 2, [IdealVoltageSource('E1', 5)]), Branch(2, 1, [Resistor('R', 10)]), Branch(3, 4, [Resistor('R2', 10)])]
+    ])
+    def test_singular_systems_need_iterative_solve(self, branches):
+        circuit = CircuitSolver(branches)
+        with pytest.raises(RuntimeError, match='unique solution'):
+            circuit.solve()
+        _, potentials = circuit.solve(iterative=True)
+        assert isclose(potentials[2], -5)
+        assert isclose(circuit.components['R'].current, -0.5)
+
+    @pytest.mark.parametrize('iterative', [False, True])
+    def test_mitic_12_7(self, iterative):
         r1 = Resistor('R1', 1)
         r2 = Resistor('R2', 2)
         r3 = Resistor('R3', 1)
@@ -73,8 +120,11 @@ class TestCircuitSolver():
         ]
 
         circuit = CircuitSolver(branches)
-        circuit.solve()
+        history, _ = circuit.solve(iterative=iterative)
 
+        if iterative:
+            # loss is quadratic, so Newton's method converges in one step
+            assert len(history) <= 3
         assert isclose(r1.current, -1)
         assert isclose(r2.current, -1)
         assert isclose(r3.current, 2)
@@ -109,4 +159,141 @@ class TestCircuitSolver():
         assert isclose(z3.current, -1-1j)
         assert isclose(e2.current, 1j)
         assert isclose(z4.current, -2+1j)
-        assert isclose(z5.current, -1+2j)
\ No newline at end of file
+        assert isclose(z5.current, -1+2j)
+
+    def test_solve_sweep(self):
+        r = Resistor('R', 100)
+        l = Inductor('L', 1, SIPrefix.Milli)
+        c = Capacitor('C', 1, SIPrefix.Micro)
+        e = IdealVoltageSource('E', 12)
+
+        branches = [
+            Branch(1, 2, [~e]),
+            Branch(2, 3, [r]),
+            Branch(3, 1, [l]),
+            Branch(3, 1, [c])
+        ]
+
+        circuit = CircuitSolver(branches)
+        omegas = [1e3, 1e4, 1e5]
+        potentials = circuit.solve_sweep(omegas)
+
+        for k, omega in enumerate(omegas):
+            _, expected = circuit.solve(omega)
+            for node_id, i in circuit.node_index.items():
+                assert isclose(potentials[k, i], expected[node_id], abs_tol=1e-4)
+
+    def test_fixed_voltage_branch(self):
+        branches = [
+            Branch(1, 2, [IdealVoltageSource('E', 10), Resistor('R', 100)]),
+            Branch(2, 1, [Inductor('L', 10, SIPrefix.Milli)]),
+            Branch(2, 1, [Resistor('R2', 100)])
+        ]
+
+        circuit = CircuitSolver(branches)
+        # inductor is a short circuit in DC mode
+        with pytest.raises(RuntimeError, match='Configuration invalid'):
+            circuit.solve(0)
+        with pytest.raises(RuntimeError, match='Configuration invalid'):
+            circuit.solve_sweep([0, 10])
+        circuit.solve(10)
+        assert circuit.solve_sweep([10]).shape == (1, 2)
+
+    def test_leaf_characteristics(self):
+        r = Resistor('R', 100)
+        l = Inductor('L', 1, SIPrefix.Milli)
+        c = Capacitor('C', 1, SIPrefix.Micro)
+        z = Impedance('Z', 10-5j)
+        e = IdealVoltageSource('E', 12)
+
+        branches = [
+            Branch(1, 2, [~e, z]),
+            Branch(2, 3, [Resistor('R2', 50)]),
+            Branch(3, 1, [r, l]),
+            Branch(3, 1, [c])
+        ]
+
+        # coefficients (a, b, c) of each leaf, by omega
+        expected = {
+            0: {r: (True, -100, 0), l: (True, 0, 0), c: (False, 1, 0), z: (True, -10+5j, 0)},
+            1e4: {r: (True, -100, 0), l: (True, -10j, 0), c: (True, 100j, 0), z: (True, -10+5j, 0)}
+        }
+
+        circuit = CircuitSolver(branches)
+        for omega, leaves in expected.items():
+            circuit.solve(omega)
+            for leaf, (a, b, c_) in leaves.items():
+                characteristic = leaf.current_voltage_characteristic(omega)
+                assert characteristic.a == a
+                assert isclose(characteristic.b, b)
+                assert isclose(characteristic.c, c_)
+
+    def test_value_change_between_solves(self):
+        r = Resistor('R', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        e = IdealVoltageSource('E', 1)
+
+        branches = [
+            Branch(1, 2, [~e]),
+            Branch(2, 1, [r, l])
+        ]
+
+        circuit = CircuitSolver(branches)
+        omega = 1e4
+        circuit.solve(omega)
+        assert isclose(abs(r.current), abs(1/(100 + 100j)))
+
+        e.value = 2
+        circuit.solve(omega)
+        assert isclose(abs(r.current), abs(2/(100 + 100j)))
+
+        l.value = 20e-3
+        circuit.solve(omega)
+        assert isclose(abs(r.current), abs(2/(100 + 200j)))
+
+    def test_repeated_solve_hits_cache(self):
+        r = Resistor('R', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        c = Capacitor('C', 10, SIPrefix.Micro)
+        e = IdealVoltageSource('E', 1)
+
+        branches = [
+            Branch(1, 2, [~e]),
+            Branch(2, 1, [r, l | c])
+        ]
+
+        circuit = CircuitSolver(branches)
+        _, expected = circuit.solve(1e3)
+        first = circuit.branches[1].characteristic
+        circuit.solve(1e4)
+        _, potentials = circuit.solve(1e3)
+        assert circuit.branches[1].characteristic is first
+        assert potentials == expected
+
+    def test_frequency_independent_value_change(self):
+        r1 = Resistor('R1', 100)
+        r2 = Resistor('R2', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        e = IdealVoltageSource('E', 10)
+
+        branches = [
+            Branch(1, 2, [~e]),
+            Branch(2, 1, [r1 | (r2 & l)])
+        ]
+
+        circuit = CircuitSolver(branches)
+        circuit.solve(0)
+        assert isclose(r1.current, 0.1)
+        # resistors have a single characteristic for all omegas, which is reused across solves
+        characteristic = r1.current_voltage_characteristic(0)
+        circuit.solve(1e4)
+        assert r1.current_voltage_characteristic(1e4) is characteristic
+        assert r1.characteristics == {None: characteristic}
+
+        # resistors share one cached characteristic across omegas, which must not survive a value change
+        r1.value = 50
+        circuit.solve(0)
+        assert isclose(r1.current, 0.2)
+        circuit.solve(1e4)
+        assert isclose(r1.current, 0.2)
+        assert isclose(r2.current, 10/(100 + 100j))
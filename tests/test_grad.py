@@ -34,6 +34,33 @@ class TestMicrograd():
         z.backward()
         assert isclose(z.grad*2*x.data.conjugate(), x.grad)
 
+    def test_long_chain(self):
+        x = Value(1+1j)
+        z = x
+        for _ in range(10000):
+            z = z + x
+        z.backward()
+        assert isclose(x.grad, 10001)
+
+    def test_constants_are_pruned(self):
+        x, c = Value(1+1j), Value(2-1j, requires_grad=False)
+        k = c * 3 + 1
+        assert not k.requires_grad
+        assert k.is_leaf
+        assert k.inputs == ()
+        z = x * k + c
+        z.backward()
+        assert isclose(x.grad, k.data)
+        assert c.grad == 0
+        assert k.grad == 0
+
+    def test_abs_sq(self):
+        x = Value(4+9j)
+        z = x.abs_sq()
+        assert isclose(z.data, 4**2 + 9**2)
+        z.backward()
+        assert isclose(2*x.data.conjugate(), x.grad)
+
     def test_phase(self):
         z = Value(1+1j)
         phi = z.phase()
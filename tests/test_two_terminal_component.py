@@ -2,6 +2,7 @@ import sys
 sys.path.append("./src")
 from two_terminal_component import *
 from cmath import isclose, phase, pi
+import numpy as np
 
 class TestTwoTerminalComponent():
     def test_simple_series(self):
@@ -89,4 +90,140 @@ class TestTwoTerminalComponent():
         assert isclose(abs(I1_2), 3.3)
         assert isclose(phase(I1_2), -pi/2)
 
+    def test_composite_characteristic(self):
+        omega = 1e3
+        r = Resistor('R', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        c = Capacitor('C', 10, SIPrefix.Micro)
+        j = IdealCurrentSource('J', 1)
+        components = [r, l, c, j]
+
+        parallel = r | l | c | j
+        expected = CurrentVoltageCharacteristic.open_circuit()
+        for component in components:
+            expected = expected | component.current_voltage_characteristic(omega)
+        characteristic = parallel.current_voltage_characteristic(omega)
+        assert isclose(characteristic.b, expected.b)
+        assert isclose(characteristic.c, expected.c)
+
+        series = r & l & c
+        expected = CurrentVoltageCharacteristic.short_circuit()
+        for component in components[:-1]:
+            expected = expected & component.current_voltage_characteristic(omega)
+        characteristic = series.current_voltage_characteristic(omega)
+        assert isclose(characteristic.b, expected.b)
+        assert isclose(characteristic.c, expected.c)
+
+    def test_nested_composites_are_merged(self):
+        r1 = Resistor('R1', 100)
+        r2 = Resistor('R2', 200)
+        j = IdealCurrentSource('J', 1)
+        e = IdealVoltageSource('E', 1)
+
+        series = Series().add_component(r1).add_component(r2 & j)
+        assert series.components == [r1, r2]
+        assert series.fixed_current_component is j
+
+        parallel = Parallel().add_component(r1).add_component(r2 | e)
+        assert parallel.components == [r1, r2]
+        assert parallel.fixed_voltage_component is e
+
+        series = Series.from_iterable([r1, r2, j])
+        assert series.components == [r1, r2]
+        assert series.fixed_current_component is j
+
+        parallel = Parallel().add_components([r1, r2 | e])
+        assert parallel.components == [r1, r2]
+        assert parallel.fixed_voltage_component is e
+
+        parallel.remove_component(e)
+        assert parallel.fixed_voltage_component is None
+        series.remove_component(j).remove_component(r1)
+        assert series.fixed_current_component is None
+        assert series.components == [r2]
+
+    def test_batched_characteristics(self):
+        omegas = np.array([0, 1e2, 1e3, 1e4])
+        r = Resistor('R', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        c = Capacitor('C', 10, SIPrefix.Micro)
+        j = IdealCurrentSource('J', 1)
+        e = IdealVoltageSource('E', 5)
+
+        for circuit in [(r & l) | c | j, (r | c) & l & e, (l | j) & c]:
+            a, b, c_ = circuit.calculate_current_voltage_characteristics(omegas)
+            for k, omega in enumerate(omegas.tolist()):
+                expected = circuit.calculate_current_voltage_characteristic(omega)
+                assert a[k] == expected.a
+                assert isclose(b[k], expected.b)
+                assert isclose(c_[k], expected.c)
+
+    def test_characteristic_cache(self):
+        r = Resistor('R', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        e = IdealVoltageSource('E', 5)
+        circuit = r & l & e
+
+        first = circuit.current_voltage_characteristic(1e3)
+        second = circuit.current_voltage_characteristic(1e4)
+        assert circuit.current_voltage_characteristic(1e3) is first
+        assert circuit.current_voltage_characteristic(1e4) is second
+
+        circuit.reverse()
+        assert isclose(circuit.current_voltage_characteristic(1e3).c, -5)
+        assert isclose(circuit.calculate_current_voltage_characteristic(1e4).c, -5)
+
+        circuit.add_component(Resistor('R2', 100))
+        assert isclose(circuit.current_voltage_characteristic(1e3).b, first.b - 100)
+
+        assert r.current_voltage_characteristic(1e3) is r.current_voltage_characteristic(0)
+        assert l.current_voltage_characteristic(1e3) is not l.current_voltage_characteristic(0)
+
+        j = IdealCurrentSource('J', 1)
+        assert isclose(j.current_voltage_characteristic(0).c, 1)
+        j.amperage = 3
+        assert isclose(j.current_voltage_characteristic(0).c, 3)
+        e.emf = 7
+        assert isclose(e.current_voltage_characteristic(0).c, 7)
+
+    def test_nested_value_change(self):
+        r1 = Resistor('R1', 100)
+        r2 = Resistor('R2', 100)
+        r3 = Resistor('R3', 100)
+        l = Inductor('L', 10, SIPrefix.Milli)
+        parallel = r2 | (r3 & l)
+        series = r1 & parallel
+        series.current_voltage_characteristic(0)
+        series.current_voltage_characteristic(1e4)
+
+        r3.value = 1e9
+        assert isclose(parallel.current_voltage_characteristic(0).b, -100, rel_tol=1e-6)
+        assert isclose(series.current_voltage_characteristic(0).b, -200, rel_tol=1e-6)
+        assert isclose(series.current_voltage_characteristic(1e4).b, -200, rel_tol=1e-6)
+
+        parallel.remove_component(r2)
+        assert isclose(series.current_voltage_characteristic(0).b, -100 - 1e9)
+        # removed component does not invalidate its former parent anymore
+        series.current_voltage_characteristic(0)
+        r2.value = 50
+        assert 0 in series.characteristics
+
+    def test_deep_reverse(self):
+        e = IdealVoltageSource('E', 5)
+        circuit = e
+        for i in range(5000):
+            wrapper = Series() if i % 2 else Parallel()
+            circuit = wrapper.add_component(circuit).add_component(Resistor(f'R{i}', 100))
+        assert ~circuit is circuit
+        assert e.value == -5
+
+    def test_traverse(self):
+        r1 = Resistor('R1', 100)
+        r2 = Resistor('R2', 200)
+        l = Inductor('L', 1)
+        j = IdealCurrentSource('J', 1)
+        circuit = (r1 | (l & j)) & r2
+        assert list(circuit.traverse()) == [r1, l, j, r2]
+        assert list(r1.traverse()) == [r1]
+
 #TestTwoTerminalComponent().test_mitic_7_28()
\ No newline at end of file